@@ -63,11 +63,17 @@ class ESM2Embedding(LanguageModelEmbedding):
         """The dtype of the embedding weights."""
         return self.word_embeddings.weight.dtype
 
+    @torch.compile
     def _apply_esm2_customization(
         self, word_embeddings: Tensor, input_ids: Tensor, attention_mask: Tensor
     ) -> Tuple[Tensor, Tensor]:
         """ESM2 customization for attention masking and token dropout.
 
+        This is a chain of small elementwise ops (mask fill, per-sequence mask ratio, rescale, attention masking) that
+        is compiled so that it runs as a few fused kernels instead of one launch per op. The vocab-parallel embedding
+        lookup and dropout stay outside of the compiled region since they involve tensor parallel communication and the
+        megatron cuda rng tracker.
+
         Args:
             word_embeddings (Tensor[float]): The input tokens. Shape: [b, s, h]
             input_ids (Tensor[int]): The input tokens. Shape: [b, s]
@@ -17,7 +17,7 @@
 import logging
 import math
 from dataclasses import dataclass
-from typing import Callable, Literal, Optional, Sequence, Type, TypeVar
+from typing import Callable, Literal, Optional, Sequence, Tuple, Type, TypeVar
 
 import torch
 import torch.distributed
@@ -116,12 +116,10 @@ class ESM2Model(MegatronBioBertModel):
         self.vocab_size = vocab_size
         self.max_sequence_length = max_sequence_length
         self.pre_process = pre_process
-        self.post_process = post_process
         self.fp16_lm_cross_entropy = fp16_lm_cross_entropy
         self.parallel_output = parallel_output
         self.share_embeddings_and_output_weights = share_embeddings_and_output_weights
         self.position_embedding_type = position_embedding_type
-        self.add_binary_head = add_binary_head
         self.return_embeddings = return_embeddings
         self.include_embeddings = include_embeddings
         self.include_hiddens = include_hiddens
@@ -154,6 +152,7 @@ class ESM2Model(MegatronBioBertModel):
                 rotary_interleaved=self.config.rotary_interleaved,
                 seq_len_interpolation_factor=seq_len_interpolation_factor,
             )
+        self._rotary_pos_emb_cache: Optional[Tuple[int, Tensor]] = None
 
         # Transformer.
         self.encoder = TransformerBlock(
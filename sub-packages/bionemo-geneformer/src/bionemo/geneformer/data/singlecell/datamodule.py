@@ -15,10 +15,13 @@
 
 
 import functools
+import os
+import re
 from pathlib import Path
 from typing import List, Literal, Optional, Sequence
 
 import numpy as np
+import torch
 from nemo.lightning.data import WrappedDataLoader
 from nemo.lightning.pytorch.plugins import MegatronDataSampler
 from nemo.utils import logging
@@ -28,6 +31,7 @@ from tokenizers import Tokenizer
 from bionemo.core.data.multi_epoch_dataset import MultiEpochDatasetResampler
 from bionemo.core.utils import random_utils
 from bionemo.geneformer.data.singlecell.dataset import SingleCellDataset
+from bionemo.geneformer.data.singlecell.utils import medians_by_token_id
 from bionemo.geneformer.tokenizer.gene_tokenizer import GeneTokenizer
 from bionemo.llm.data import collate
 from bionemo.llm.data.datamodule import MegatronDataModule
@@ -38,6 +42,9 @@ Mode = Literal["train", "validation", "test", "predict"]
 
 __all__: Sequence[str] = ("SingleCellDataModule",)
 
+NUM_WORKERS_ENV_VAR: str = "BIONEMO_NUM_DATALOADER_WORKERS"
+"""Environment variable overriding the default number of dataloader workers of `SingleCellDataModule`."""
+
 
 class SingleCellDataModule(MegatronDataModule):
     """LightningDataModule wrapper of `SingleCellDataset`
@@ -45,9 +52,13 @@ class SingleCellDataModule(MegatronDataModule):
     Args:
         data_path (Union[str, PosixPath]): Path to preprocessed single-cell data files
         tokenizer (Tokenizer): Maps gene names to ids and vice-versa
+        median_dict (dict | np.ndarray): Median expression of each gene keyed by ensembl id, or an array of the
+            medians indexed by token id (eg the memory-mapped `medians` returned by `GeneformerPreprocess`)
         collator: Used to batch samples
         process_item: Function defining how each item should be processed
-        num_workers (int): Number of workers to use
+        num_workers (int, optional): Number of workers to use. Defaults to `$BIONEMO_NUM_DATALOADER_WORKERS` if set,
+            otherwise to the CPUs available to this process split across the ranks on the node, capped at 8.
+        prefetch_factor (int): Number of batches loaded in advance by each worker, ignored when num_workers is 0
         num_mask_per_sample (int): Number of masked versions of a single sample to be returned by each worker
         train_batch_size (int): Batch size for training
         val_batch_size (int): Batch size for validation
@@ -55,7 +66,7 @@ class SingleCellDataModule(MegatronDataModule):
     Attributes:
         cfg (Config): Configuration object
         data_path (Union[str, PosixPath]): Path to preprocessed single-cell data files
-        median_dict (dict): Dictionary containing median values
+        median_dict (dict | np.ndarray): Median values keyed by ensembl id, or indexed by token id
         tokenizer (Tokenizer): Tokenizer object
         setup_called (bool): Flag indicating if the setup method has been called
         dataset (SingleCellDataset): Single-cell dataset object
@@ -66,7 +77,7 @@ class SingleCellDataModule(MegatronDataModule):
     def __init__(  # noqa: D107
         self,
         tokenizer: Tokenizer,
-        median_dict: dict[str, float],
+        median_dict: dict[str, float] | np.ndarray,
         train_dataset_path: str | Path | None = None,
         val_dataset_path: str | Path | None = None,
         test_dataset_path: str | Path | None = None,
@@ -79,9 +90,10 @@ class SingleCellDataModule(MegatronDataModule):
         global_batch_size: int = 8,
         rampup_batch_size: Optional[List[int]] = None,
         seed: int = 42,
-        num_workers: int = 10,  # TODO can this be automatically set?
+        num_workers: Optional[int] = None,
         persistent_workers: bool = True,
         pin_memory: bool = True,
+        prefetch_factor: Optional[int] = 4,
     ) -> None:
         super().__init__()
         if predict_dataset_path is None:
@@ -101,61 +113,46 @@ class SingleCellDataModule(MegatronDataModule):
         self.data_path_test = test_dataset_path
         self.tokenizer = tokenizer
         self.median_dict = median_dict
+        # Dense medians indexed by token id, built once and shared by every split (and the workers forked from them).
+        self._medians = (
+            medians_by_token_id(tokenizer.vocab, median_dict) if isinstance(median_dict, dict) else median_dict
+        )
+        num_token_ids = max(tokenizer.vocab.values()) + 1
+        if len(self._medians) < num_token_ids:
+            raise ValueError(
+                f"The medians array has {len(self._medians)} entries but the tokenizer vocab has token ids up to "
+                f"{num_token_ids - 1}, it must be indexed by the token ids of this tokenizer."
+            )
         self.max_len = seq_length
         self.mask_prob = mask_prob
         self.mask_token_prob = mask_token_prob
         self.random_token_prob = random_token_prob
         self.seed = seed
+        if num_workers is None:
+            num_workers = _default_num_workers()
+            logging.info(f"num_workers was not set, using {num_workers} dataloader workers per rank.")
         self.num_workers = num_workers
         self.persistent_workers = persistent_workers
         self.pin_memory = pin_memory
+        self.prefetch_factor = prefetch_factor
 
         rng = np.random.default_rng(seed)
         if self.data_path_train is not None:
             assert self.data_path_val is not None and self.data_path_test is not None
-            self._train_dataset_ori = SingleCellDataset(
-                self.data_path_train,
-                self.tokenizer,
-                self.median_dict,
-                self.max_len,
-                mask_prob=self.mask_prob,
-                mask_token_prob=self.mask_token_prob,
-                random_token_prob=self.random_token_prob,
-                seed=random_utils.get_seed_from_rng(rng),
-            )
-            self._val_dataset_ori = SingleCellDataset(
-                self.data_path_val,
-                self.tokenizer,
-                self.median_dict,
-                self.max_len,
-                mask_prob=self.mask_prob,
-                mask_token_prob=self.mask_token_prob,
-                random_token_prob=self.random_token_prob,
-                seed=random_utils.get_seed_from_rng(rng),
-            )
-            self._test_dataset_ori = SingleCellDataset(
-                self.data_path_test,
-                self.tokenizer,
-                self.median_dict,
-                self.max_len,
-                mask_prob=self.mask_prob,
-                mask_token_prob=self.mask_token_prob,
-                random_token_prob=self.random_token_prob,
-                seed=random_utils.get_seed_from_rng(rng),
-            )
+            # The train/val/test datasets are only built in `setup`, so that constructing the data module stays cheap
+            #  and the data files are not touched until a trainer is attached. Seeds are still drawn here, in the same
+            #  order as before, so that deferring construction does not change the samples.
+            self._train_seed = random_utils.get_seed_from_rng(rng)
+            self._val_seed = random_utils.get_seed_from_rng(rng)
+            self._test_seed = random_utils.get_seed_from_rng(rng)
+            self._train_dataset_ori = None
+            self._val_dataset_ori = None
+            self._test_dataset_ori = None
             self._predict_dataset_ori = None
         else:
             assert self.data_path_predict is not None
-            self._predict_dataset_ori = SingleCellDataset(
-                self.data_path_predict,
-                self.tokenizer,
-                self.median_dict,
-                self.max_len,
-                mask_prob=self.mask_prob,
-                mask_token_prob=self.mask_token_prob,
-                random_token_prob=self.random_token_prob,
-                seed=random_utils.get_seed_from_rng(rng),
-            )
+            # The predict dataset is built eagerly since its length is needed to size the batches of the data sampler.
+            self._predict_dataset_ori = self._make_dataset(self.data_path_predict, random_utils.get_seed_from_rng(rng))
             self._train_dataset_ori = None
             self._val_dataset_ori = None
             self._test_dataset_ori = None
@@ -179,11 +176,28 @@ class SingleCellDataModule(MegatronDataModule):
                 rampup_batch_size=rampup_batch_size,
             )
 
+    def _make_dataset(self, data_path: str | Path, seed: int) -> SingleCellDataset:
+        """Builds a `SingleCellDataset` for one split, all splits share the tokenizer and the medians array."""
+        return SingleCellDataset(
+            data_path,
+            self.tokenizer,
+            self._medians,
+            self.max_len,
+            mask_prob=self.mask_prob,
+            mask_token_prob=self.mask_token_prob,
+            random_token_prob=self.random_token_prob,
+            seed=seed,
+        )
+
     def setup(self, stage: str = "") -> None:  # noqa: D102
         assert getattr(self, "trainer", None) is not None, "Please only call setup after trainer is attached."
 
-        if self._train_dataset_ori is not None:
-            assert self._val_dataset_ori is not None and self._test_dataset_ori is not None
+        if self.data_path_train is not None:
+            if self._train_dataset_ori is None:
+                # setup may be called once per stage, only build the datasets the first time around.
+                self._train_dataset_ori = self._make_dataset(self.data_path_train, self._train_seed)
+                self._val_dataset_ori = self._make_dataset(self.data_path_val, self._val_seed)
+                self._test_dataset_ori = self._make_dataset(self.data_path_test, self._test_seed)
             # Trainer API
             max_train_steps = self.trainer.max_steps
             if self.trainer.max_epochs > 1:
@@ -259,7 +273,9 @@ class SingleCellDataModule(MegatronDataModule):
             dataset=dataset,
             num_workers=self.num_workers,
             pin_memory=self.pin_memory,
-            persistent_workers=self.persistent_workers,
+            # Both persistent_workers and prefetch_factor may only be set when loading with worker processes.
+            persistent_workers=self.persistent_workers and self.num_workers > 0,
+            prefetch_factor=self.prefetch_factor if self.num_workers > 0 else None,
             collate_fn=functools.partial(
                 collate.bert_padding_collate_fn,
                 padding_value=self.tokenizer.token_to_id(GeneTokenizer.pad_token),
@@ -268,3 +284,30 @@ class SingleCellDataModule(MegatronDataModule):
             ),
             **kwargs,
         )
+
+
+def _default_num_workers(max_workers: int = 8) -> int:
+    """Number of dataloader workers per rank that does not oversubscribe the CPUs available to this process.
+
+    Workers beyond the available cores contend with each other and with the training loop, and quickly make data
+    loading slower rather than faster, so the CPUs are split across the ranks sharing the node. Setting the
+    `NUM_WORKERS_ENV_VAR` environment variable overrides the heuristic.
+    """
+    if NUM_WORKERS_ENV_VAR in os.environ:
+        return int(os.environ[NUM_WORKERS_ENV_VAR])
+    try:
+        num_cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on every platform, eg macOS.
+        num_cpus = os.cpu_count() or 1
+    return max(1, min(num_cpus // _ranks_per_node(), max_workers))
+
+
+def _ranks_per_node() -> int:
+    """Number of training processes on this node, from the launcher's environment or else the number of GPUs."""
+    # torchrun sets LOCAL_WORLD_SIZE, SLURM sets SLURM_NTASKS_PER_NODE (eg "4", or "4(x2)" for heterogeneous jobs).
+    for env_var in ("LOCAL_WORLD_SIZE", "SLURM_NTASKS_PER_NODE"):
+        match = re.match(r"\d+", os.environ.get(env_var, ""))
+        if match is not None and int(match.group()) > 0:
+            return int(match.group())
+    # Lightning's subprocess launcher starts one process per device without exporting either variable.
+    return max(1, torch.cuda.device_count())
@@ -25,7 +25,7 @@ from torch.utils.data import Dataset
 
 from bionemo.core.data.multi_epoch_dataset import EpochIndex
 from bionemo.core.utils import random_utils
-from bionemo.geneformer.data.singlecell.utils import sample_or_truncate
+from bionemo.geneformer.data.singlecell.utils import medians_by_token_id, sample_or_truncate
 from bionemo.geneformer.tokenizer.gene_tokenizer import GeneTokenizer
 from bionemo.llm.data import masking, types
 
@@ -49,14 +49,15 @@ class SingleCellDataset(Dataset):
                 - `gene_expression_ind.npy`: Gene indices associated with gene values.
                 - `gene_expression_ptr.npy`: Column indices for each sample.
         tokenizer: The tokenizer to use for tokenizing the input data.
-        median_dict (dict, optional): A dictionary containing median values for each gene. Defaults to None.
+        median_dict (dict or numpy.ndarray, optional): Median values for each gene, either as a dictionary keyed by
+            ensembl id or as a dense array indexed by token id (see `medians_by_token_id`). Defaults to None.
         max_len (int, optional): The maximum length of the input sequence. Defaults to 1024.
 
     Attributes:
         data_path (str): Path where the single cell files are stored.
         max_len (int): The maximum length of the input sequence.
         metadata (dict): Metadata loaded from `metadata.json`.
-        gene_medians (dict): A dictionary containing median values for each gene. If None, a median of '1' is assumed for all genes.
+        gene_medians (numpy.ndarray): Median values for each gene indexed by token id, genes without a median get '1'.
         num_train (int): The number of samples in the training split.
         num_val (int): The number of samples in the validation split.
         num_test (int): The number of samples in the test split.
@@ -81,7 +82,7 @@ class SingleCellDataset(Dataset):
         self,
         data_path: str | Path,
         tokenizer: Any,
-        median_dict: Optional[dict] = None,
+        median_dict: Optional[dict | np.ndarray] = None,
         max_len: int = 1024,
         mask_prob: float = 0.15,
         mask_token_prob: float = 0.8,
@@ -108,7 +109,9 @@ class SingleCellDataset(Dataset):
         # - metadata
         metadata = json.load(open(path / "metadata.json", "r"))
 
-        # - median dict
+        # - median dict, converted once to a dense array indexed by token id so samples are normalized with one gather.
+        if isinstance(median_dict, dict):
+            median_dict = medians_by_token_id(tokenizer.vocab, median_dict)
         self.gene_medians = median_dict
 
         # - train/val idxs sampled contiguously
@@ -169,13 +172,19 @@ class SingleCellDataset(Dataset):
             )
             self.feature_ids = feature_ids
             self.metadata = None
+        # Token id of every feature (-1 if not in the vocab), so that samples are tokenized with one gather. Only
+        #  possible when all files share the same feature_ids, per-file samples resolve their tokens on the fly.
+        self.feature_token_ids = (
+            None if self.feature_ids is None else _token_ids_or_missing(tokenizer.vocab, self.feature_ids)
+        )
 
     def __len__(self):  # noqa: D105
         return self.num_samples
 
     def metadata_lookup(self, idx) -> Dict[str, np.ndarray]:
         """Go from a cell idx to the file-level metadata associated with that cell."""
-        did = sum(~(self.dataset_ccum > idx)) - 1
+        # dataset_ccum is sorted, so the number of files starting at or before idx is a binary search away.
+        did = int(np.searchsorted(self.dataset_ccum, idx, side="right")) - 1
         metadata = self.metadata[self.dataset_map[did]]
         return metadata
 
@@ -207,6 +216,7 @@ class SingleCellDataset(Dataset):
             self.tokenizer,
             gene_median=self.gene_medians,
             rng=rng,
+            feature_token_ids=self.feature_token_ids,
             max_len=self.max_len,
             mask_token_prob=self.mask_token_prob,
             mask_prob=self.mask_prob,
@@ -221,7 +231,7 @@ def process_item(  # noqa: D417
     gene_idxs: np.ndarray,
     feature_ids: np.ndarray,
     tokenizer: GeneTokenizer,
-    gene_median: dict,
+    gene_median: dict | np.ndarray,
     rng: np.random.Generator,
     max_len: int = 1024,
     mask_prob: float = 0.15,
@@ -231,6 +241,7 @@ def process_item(  # noqa: D417
     normalize: bool = True,
     prepend_cls_token: bool = True,
     eos_token: None | int = None,
+    feature_token_ids: Optional[np.ndarray] = None,
 ) -> types.BertSample:
     """Process a single item in the dataset.
 
@@ -243,6 +254,7 @@ def process_item(  # noqa: D417
         feature_ids (list): Feature ids for the full dataset.
         tokenizer (Tokenizer): Tokenizer object.
         gene_median (optional(dict)): Dictionary of gene medians. Defaults to None. Expects ensembl IDs to be keys.
+            Alternatively a dense array of medians indexed by token id, see `medians_by_token_id`.
         rng: Random number generator to ensure deterministic results.
         max_len (int): Maximum length of the item. Defaults to 1024. Applies padding to any sequence shorter than max_len and truncates any sequence longer than max_len.
         mask_prob (float): Probability of masking a token. Defaults to 0.15.
@@ -253,6 +265,8 @@ def process_item(  # noqa: D417
         dirichlet_alpha (float): Alpha value for dirichlet sampling if set by `probabilistic_dirichlet_sampling`. Defaults to 0.5.
         same_length (bool): when true, sample the same length of genes as you originally had before the dirichlet sampler.
         recompute_globals (bool): when true, global arrays are always recomputed. this is only useful for testing.
+        feature_token_ids (optional(np.ndarray)): Token id of every entry in `feature_ids`, -1 for features that are not
+            in the vocab. Computed from `feature_ids` and the tokenizer vocab if not provided.
 
     Returns:
         dict: Processed item dictionary.
@@ -271,21 +285,21 @@ def process_item(  # noqa: D417
     if eos_token is not None:
         max_len = max_len - 1  # - minus 1 for [EOS] token
 
-    gene_names = [feature_ids[idx] for idx in gene_idxs]
-    genes, tokens, medians = [], [], []
-    for tok, gene in zip(gene_names, gene_data):
-        if tok in tokenizer.vocab:
-            tokens.append(tokenizer.token_to_id(tok))
-            genes.append(gene)
-            if normalize:
-                med = gene_median.get(tok, 1)  # If not in the dictionary we default to no normalization (1)
-                medians.append(med)
-
-    genes = np.asarray(genes)
-    token_ids = np.asarray(tokens)
-    medians = np.asarray(medians)
+    if feature_token_ids is not None:
+        token_ids = feature_token_ids[gene_idxs]
+    else:
+        token_ids = _token_ids_or_missing(tokenizer.vocab, [feature_ids[idx] for idx in gene_idxs])
+    # Genes that are not in the vocab are dropped.
+    in_vocab = token_ids >= 0
+    token_ids = token_ids[in_vocab]
+    genes = np.asarray(gene_data)[in_vocab]
 
     if normalize:
+        if isinstance(gene_median, np.ndarray):
+            medians = gene_median[token_ids]
+        else:
+            # If not in the dictionary we default to no normalization (1)
+            medians = np.asarray([gene_median.get(feature_ids[idx], 1) for idx in np.asarray(gene_idxs)[in_vocab]])
         # re-order according to expression median normalized rank. descending order.
 
         genes = genes / genes.sum() * target_sum
@@ -308,7 +322,7 @@ def process_item(  # noqa: D417
                 random_token_prob=random_token_prob,
             ),
         )
-        cls_token = tokenizer.token_to_id(tokenizer.cls_token) if prepend_cls_token else None
+        cls_token = tokenizer.class_id if prepend_cls_token else None
         if cls_token is not None or eos_token is not None:
             masked_tokens, labels, loss_mask = masking.add_cls_and_eos_tokens(
                 sequence=masked_tokens,
@@ -327,3 +341,8 @@ def process_item(  # noqa: D417
             "loss_mask": loss_mask,
             "is_random": torch.zeros_like(masked_tokens, dtype=torch.int64),
         }
+
+
+def _token_ids_or_missing(vocab: Dict[str, int], tokens: Sequence[str]) -> np.ndarray:
+    """Maps `tokens` to their ids in `vocab`, using -1 for tokens that are not in the vocab."""
+    return np.fromiter((vocab.get(token, -1) for token in tokens), dtype=np.int64, count=len(tokens))
@@ -17,13 +17,16 @@
 import json
 import os
 import pickle
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, List, Literal, Sequence
 
+import numpy as np
 from nemo.utils import logging
 
 from bionemo.geneformer.data.preprocess import ResourcePreprocessor
+from bionemo.geneformer.data.singlecell.utils import medians_by_token_id, replace_atomically
 from bionemo.geneformer.tokenizer.gene_tokenizer import GeneTokenizer
 from bionemo.llm.utils.remote import RemoteResource
 
@@ -68,7 +71,10 @@ class GeneformerResourcePreprocessor(ResourcePreprocessor):
         return resource.download_resource()
 
     def prepare(self):  # noqa: D102
-        return [self.prepare_resource(resource) for resource in self.get_remote_resources()]
+        resources = self.get_remote_resources()
+        # Downloads are I/O bound and write to separate files, so fetch them concurrently. map preserves the order.
+        with ThreadPoolExecutor(max_workers=max(1, min(len(resources), 8))) as executor:
+            return list(executor.map(self.prepare_resource, resources))
 
 
 class GeneformerPreprocess:  # noqa: D101
@@ -98,14 +104,38 @@ class GeneformerPreprocess:  # noqa: D101
     def _validate_tokenizer_args(self, vocab_output_name):
         vocab_exists = os.path.exists(vocab_output_name)
         if vocab_exists:
-            logging.warning(f"Tokenizer vocab file: {vocab_output_name} already exists. Overwriting...")
+            logging.warning(
+                f"Tokenizer vocab file: {vocab_output_name} already exists. Reusing it if it is newer than the "
+                "downloaded resources, overwriting otherwise..."
+            )
 
-    def preprocess(self) -> dict[Literal["tokenizer", "median_dict"], Any]:
+    def preprocess(self) -> dict[Literal["tokenizer", "median_dict", "medians"], Any]:
         """Preprocesses for the Geneformer model"""  # noqa: D415
         gene_name_dict_fn, gene_median_dict_fn = GeneformerResourcePreprocessor(
             dest_directory=self.download_directory,
         ).prepare()
 
+        medians_npy_path = Path(self.medians_file_path).with_suffix(".npy")
+        converted_paths = [self.tokenizer_vocab_path, self.medians_file_path, medians_npy_path]
+        if self.tokenizer_vocab_path is not None and _all_newer_than(
+            converted_paths, [gene_name_dict_fn, gene_median_dict_fn]
+        ):
+            # The converted artifacts of a previous run are up to date, load those rather than unpickling again.
+            tokenizer = GeneTokenizer.from_vocab_file(self.tokenizer_vocab_path)
+            medians = np.load(medians_npy_path, mmap_mode="r")
+            # The medians must have been written for this vocab, eg not if the vocab file was replaced since.
+            if len(medians) == max(tokenizer.vocab.values()) + 1:
+                # The vocab is built from the median dict keys (after the special tokens), so the dict is recovered.
+                median_values = medians.tolist()
+                median_dict = {
+                    token: median_values[token_id]
+                    for token, token_id in tokenizer.vocab.items()
+                    if token not in GeneTokenizer.special_tokens
+                }
+                return {"tokenizer": tokenizer, "median_dict": median_dict, "medians": medians}
+            del medians  # release the mapping of the stale file, which is replaced below.
+            logging.warning(f"{medians_npy_path} does not match {self.tokenizer_vocab_path}, rebuilding both.")
+
         # Load artifacts
         with open(gene_name_dict_fn, "rb") as fd:
             gene_ens = pickle.load(fd)
@@ -117,7 +147,9 @@ class GeneformerPreprocess:  # noqa: D101
         medians_dir = os.path.dirname(self.medians_file_path)
         if not os.path.exists(medians_dir):
             os.makedirs(medians_dir, exist_ok=True)  # ensure the dir exists but be ok with race conditions.
-        with open(self.medians_file_path, "w") as fp:
+        # Every rank runs preprocessing on the shared data directory and may read these files back (see above), so
+        #  each one is written to a temporary file and renamed into place.
+        with replace_atomically(self.medians_file_path) as tmp_path, open(tmp_path, "w") as fp:
             json.dump(median_dict, fp)
 
         if self.tokenizer_vocab_path is not None:
@@ -126,7 +158,21 @@ class GeneformerPreprocess:  # noqa: D101
                 gene_ens,
                 self.tokenizer_vocab_path,
             )
+            # Dense copy of the medians aligned with the token ids, so datasets can normalize with a single gather. It
+            #  is returned memory mapped so that dataloader workers share it through the page cache. The rename also
+            #  leaves mappings of a previous version (eg held by a running job) intact rather than truncating them.
+            with replace_atomically(medians_npy_path) as tmp_path, open(tmp_path, "wb") as fp:
+                np.save(fp, medians_by_token_id(tokenizer.vocab, median_dict))
+            medians = np.load(medians_npy_path, mmap_mode="r")
         else:
             tokenizer = None
+            medians = None
+
+        return {"tokenizer": tokenizer, "median_dict": median_dict, "medians": medians}
+
 
-        return {"tokenizer": tokenizer, "median_dict": median_dict}
+def _all_newer_than(paths: Sequence[str | Path], sources: Sequence[str | Path]) -> bool:
+    """True if every file in `paths` exists and was modified no earlier than every file in `sources`."""
+    if not all(os.path.exists(path) for path in paths):
+        return False
+    return min(os.path.getmtime(path) for path in paths) >= max(os.path.getmtime(source) for source in sources)
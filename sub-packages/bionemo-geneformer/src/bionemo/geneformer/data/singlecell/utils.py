@@ -13,6 +13,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextlib
+import os
+import uuid
+from pathlib import Path
+from typing import Iterator, Mapping
+
 import numpy as np
 
 
@@ -39,3 +45,45 @@ def sample_or_truncate(
         return gene_ids[indices]
     else:
         return gene_ids[:max_length]
+
+
+def medians_by_token_id(vocab: Mapping[str, int], median_dict: Mapping[str, float]) -> np.ndarray:
+    """Build a dense lookup table of gene medians indexed by token id.
+
+    Args:
+        vocab (Mapping[str, int]): Tokenizer vocab mapping ensembl ids to token ids.
+        median_dict (Mapping[str, float]): Median expression value for each ensembl id.
+
+    Returns:
+        np.ndarray: Array of length `max(token id) + 1` with the median of each token. Tokens without a median (special
+            tokens, or genes missing from `median_dict`) get a median of 1, which means no normalization.
+    """
+    medians = np.ones(max(vocab.values()) + 1, dtype=np.float64)
+    for token, token_id in vocab.items():
+        median = median_dict.get(token)
+        if median is not None:
+            medians[token_id] = median
+    return medians
+
+
+@contextlib.contextmanager
+def replace_atomically(path: str | Path) -> Iterator[str]:
+    """Yield a temporary path next to `path`, which is moved over `path` once the block exits without error.
+
+    Processes reading `path` concurrently (eg other ranks running the same preprocessing, or a memory map of the
+    previous version) see either the old or the new file, never a partially written one.
+
+    Args:
+        path (str | Path): Final location of the file written inside the block.
+
+    Yields:
+        str: Path to write to, in the same directory as `path` so that the final rename does not cross filesystems.
+    """
+    directory, name = os.path.split(os.fspath(path))
+    tmp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
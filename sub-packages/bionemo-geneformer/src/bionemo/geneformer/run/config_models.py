@@ -17,6 +17,7 @@ import pathlib
 from dataclasses import dataclass, field
 from typing import List, Optional, Type
 
+import numpy as np
 from nemo.utils import logging
 from tokenizers import Tokenizer
 
@@ -36,6 +37,8 @@ class GeneformerDataArtifacts:
 
     tokenizer: Tokenizer
     median_dict: dict
+    medians: Optional[np.ndarray] = None
+    """Memory mapped medians indexed by token id, shared by the dataloader workers through the page cache."""
 
 
 class GeneformerPretrainingDataConfig(DataConfig[SingleCellDataModule]):
@@ -95,7 +98,9 @@ class GeneformerPretrainingDataConfig(DataConfig[SingleCellDataModule]):
         result = preprocessor.preprocess()
         if "tokenizer" in result and "median_dict" in result:
             logging.info("*************** Preprocessing Finished ************")
-            return GeneformerDataArtifacts(tokenizer=result["tokenizer"], median_dict=result["median_dict"])
+            return GeneformerDataArtifacts(
+                tokenizer=result["tokenizer"], median_dict=result["median_dict"], medians=result.get("medians")
+            )
         else:
             logging.error("Preprocessing failed.")
             raise ValueError("Preprocessing failed to create tokenizer and/or median dictionary.")
@@ -110,7 +115,11 @@ class GeneformerPretrainingDataConfig(DataConfig[SingleCellDataModule]):
             val_dataset_path=self.val_data_path,
             test_dataset_path=self.test_data_path,
             random_token_prob=0.02,
-            median_dict=geneformer_data_artifacts.median_dict,
+            median_dict=(
+                geneformer_data_artifacts.median_dict
+                if geneformer_data_artifacts.medians is None
+                else geneformer_data_artifacts.medians
+            ),
             micro_batch_size=self.micro_batch_size,
             global_batch_size=global_batch_size,
             persistent_workers=self.num_dataset_workers > 0,
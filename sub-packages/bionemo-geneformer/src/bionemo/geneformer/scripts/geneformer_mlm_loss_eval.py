@@ -142,7 +142,7 @@ def main(
         tokenizer_vocab_path=train_data_path / "geneformer.vocab",
     )
     match preprocessor.preprocess():
-        case {"tokenizer": tokenizer, "median_dict": median_dict}:
+        case {"tokenizer": tokenizer, "medians": medians}:
             logging.info("*************** Preprocessing Finished ************")
         case _:
             logging.error("Failed to download the tokenizer for the NV geneformer model.")
@@ -181,7 +181,7 @@ def main(
         ds_nv = SingleCellDataset(
             dataset_path,
             tokenizer=tokenizer_filt,  # TODO replace with the filtered one.
-            median_dict=median_dict,
+            median_dict=medians,
             max_len=seq_len_nv,
             mask_prob=mask_prob,
             seed=seed,
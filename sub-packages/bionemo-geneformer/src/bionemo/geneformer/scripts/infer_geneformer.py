@@ -73,7 +73,7 @@ def infer_model(
         tokenizer_vocab_path=train_data_path / "geneformer.vocab",
     )
     match preprocessor.preprocess():
-        case {"tokenizer": tokenizer, "median_dict": median_dict}:
+        case {"tokenizer": tokenizer, "medians": medians}:
             logging.info("*************** Preprocessing Finished ************")
         case _:
             logging.error("Preprocessing failed.")
@@ -105,7 +105,7 @@ def infer_model(
         mask_prob=0,
         mask_token_prob=0,
         random_token_prob=0,  # changed to represent the incorrect setting we originally used.
-        median_dict=median_dict,
+        median_dict=medians,
         micro_batch_size=micro_batch_size,
         global_batch_size=global_batch_size,
         # persistent workers is supported when num_dataset_workers > 0
@@ -245,7 +245,7 @@ def main(
         tokenizer_vocab_path=train_data_path / "geneformer.vocab",
     )
     match preprocessor.preprocess():
-        case {"tokenizer": tokenizer, "median_dict": median_dict}:
+        case {"tokenizer": tokenizer, "medians": medians}:
             logging.info("*************** Preprocessing Finished ************")
         case _:
             logging.error("Preprocessing failed.")
@@ -258,7 +258,7 @@ def main(
         val_dataset_path=str(val_data_path),
         test_dataset_path=str(test_data_path),
         random_token_prob=0.02,  # changed to represent the incorrect setting we originally used.
-        median_dict=median_dict,
+        median_dict=medians,
         micro_batch_size=micro_batch_size,
         global_batch_size=global_batch_size,
         # persistent workers is supported when num_dataset_workers > 0
@@ -14,19 +14,31 @@
 # limitations under the License.
 
 
+import functools
 import json
 import os
-from copy import deepcopy
-from typing import Dict, List, Sequence, Tuple, TypeVar, Union
+import sys
+from typing import Dict, Iterable, List, Sequence, Tuple, TypeVar, Union
 
+import numpy as np
+import pandas as pd
 from nemo.lightning import io
 
+from bionemo.geneformer.data.singlecell.utils import replace_atomically
 from bionemo.llm.data.label2id_tokenizer import Label2IDTokenizer
 
 
+try:
+    import orjson
+except ImportError:
+    # orjson is only used to speed up (de)serialization of the vocab file, the on-disk format is plain JSON either way.
+    orjson = None
+
 __all__: Sequence[str] = ("GeneTokenizer",)
 
 T = TypeVar("T", bound="GeneTokenizer")
+T_Key = TypeVar("T_Key")
+
 
 
 class GeneTokenizer(Label2IDTokenizer, io.IOMixin):
@@ -45,10 +57,51 @@ class GeneTokenizer(Label2IDTokenizer, io.IOMixin):
         assert set(self.special_tokens).issubset(
             set(vocab.keys())
         ), f"Vocab must contain all of {self.special_tokens}, missing {set(self.special_tokens) - set(vocab.keys())}"
-        self.gene_to_ens = deepcopy(gene_to_ens)
-        self.ens_to_gene = {v: k for k, v in self.gene_to_ens.items()}
-        self.vocab = deepcopy(vocab)
-        self.decode_vocab = {v: k for k, v in self.vocab.items()}
+        # Keys and values are immutable strings/ints, so a shallow copy is enough to decouple from the caller. Strings
+        #  are interned while copying (see `_intern`) so that ensembl ids shared between vocab and gene_to_ens are
+        #  stored once, and lookups with interned keys short-circuit on identity.
+        self.gene_to_ens = {_intern(k): _intern(v) for k, v in gene_to_ens.items()}
+        self.ens_to_gene = dict(zip(self.gene_to_ens.values(), self.gene_to_ens.keys()))
+        self.vocab = {_intern(k): v for k, v in vocab.items()}
+        self.decode_vocab = dict(zip(self.vocab.values(), self.vocab.keys()))
+
+    @property
+    def gene_to_ens(self) -> Dict[str, str]:
+        """Gene name to Ensembl ID mapping.
+
+        The batched lookups go through arrays built from this mapping on first use. If the dictionary is edited in
+        place, assign it again (`tokenizer.gene_to_ens = tokenizer.gene_to_ens`) to rebuild them.
+        """
+        return self._gene_to_ens
+
+    @gene_to_ens.setter
+    def gene_to_ens(self, gene_to_ens: Dict[str, str]) -> None:
+        self._gene_to_ens = gene_to_ens
+        self.__dict__.pop("_gene_to_ens_arrays", None)
+
+    @property
+    def ens_to_gene(self) -> Dict[str, str]:
+        """Ensembl ID to gene name mapping, see `gene_to_ens` for in place edits."""
+        return self._ens_to_gene
+
+    @ens_to_gene.setter
+    def ens_to_gene(self, ens_to_gene: Dict[str, str]) -> None:
+        self._ens_to_gene = ens_to_gene
+        self.__dict__.pop("_ens_to_gene_arrays", None)
+
+    @functools.cached_property
+    def _gene_to_ens_arrays(self) -> Tuple[pd.Index, np.ndarray]:
+        """Parallel (gene index, ensembl id array) layout of `gene_to_ens`, used by the batched lookups.
+
+        Built on first use, since callers that only go through the dict based lookups never need it. Dropped when
+        `gene_to_ens` is reassigned.
+        """
+        return _as_parallel_arrays(self.gene_to_ens)
+
+    @functools.cached_property
+    def _ens_to_gene_arrays(self) -> Tuple[pd.Index, np.ndarray]:
+        """Parallel (ensembl index, gene name array) layout of `ens_to_gene`, used by the batched lookups."""
+        return _as_parallel_arrays(self.ens_to_gene)
 
     @classmethod
     def from_medians_and_genes_dicts(cls, median_dict: Dict[str, float], gene_to_ens: Dict[str, str]) -> T:
@@ -60,14 +113,54 @@ class GeneTokenizer(Label2IDTokenizer, io.IOMixin):
     @staticmethod
     def _build_vocab(strings: Union[List[str], str]) -> Dict[str, int]:
         """We override the parent because complete strings are tokens. Otherwise, has the same behavior."""
-        vocab: Dict[str, int] = {}
         if isinstance(strings, str):
             strings = [strings]
+        # dict.fromkeys de-duplicates while preserving first-seen order, so ids are assigned in order of appearance.
+        return {token: i for i, token in enumerate(dict.fromkeys(map(_intern, strings)))}
+
+    @property
+    def vocab(self) -> Dict[str, int]:
+        """Token to id mapping.
 
-        for token in strings:
-            if token not in vocab:
-                vocab[token] = len(vocab)
-        return vocab
+        The special token ids are cached when the vocab is assigned. If the dictionary is edited in place, assign it
+        again (`tokenizer.vocab = tokenizer.vocab`) to refresh them.
+        """
+        return self._vocab
+
+    @vocab.setter
+    def vocab(self, vocab: Dict[str, int]) -> None:
+        self._vocab = vocab
+        # Special token ids are read on every sample/batch, so resolve them once whenever the vocab is (re)assigned.
+        self._pad_id = vocab.get(self.pad_token)
+        self._mask_token_id = vocab.get(self.mask_token)
+        self._class_id = vocab.get(self.cls_token)
+        self._ukw_id = vocab.get(self.ukw_token)
+
+    @property
+    def decode_vocab(self) -> Dict[int, str]:
+        """Id to token mapping.
+
+        `ids_to_tokens` decodes through a list built when the mapping is assigned. If the dictionary is edited in
+        place, assign it again (`tokenizer.decode_vocab = tokenizer.decode_vocab`) to rebuild that list.
+        """
+        return self._decode_vocab
+
+    @decode_vocab.setter
+    def decode_vocab(self, decode_vocab: Dict[int, str]) -> None:
+        self._decode_vocab = decode_vocab
+        # Ids are (close to) contiguous, so a list indexed by id decodes without hashing. Gaps are left as None.
+        id_to_token: List[str | None] = [None] * (max(decode_vocab, default=-1) + 1)
+        for id_, token in decode_vocab.items():
+            id_to_token[id_] = token
+        self._id_to_token = id_to_token
+
+    def build_vocab(self, strings: Union[str, Iterable[str]]) -> "GeneTokenizer":
+        """Extends the vocab like the parent class, then reassigns it so that the derived lookups stay in sync."""
+        super().build_vocab(strings)
+        # The parent edits both dictionaries in place, which bypasses the setters.
+        self.vocab = self.vocab
+        self.decode_vocab = self.decode_vocab
+        return self
 
     def token_to_id(self, token: str) -> int:
         """Converts a token to its corresponding ID.
@@ -76,17 +169,17 @@ class GeneTokenizer(Label2IDTokenizer, io.IOMixin):
             token: The token to be converted.
 
         Returns:
-            The ID corresponding to the token.
+            The ID corresponding to the token, or the ID of the unknown token (`ukw_token`) if it is not in the vocab.
         """
-        return self.vocab.get(token)
+        return self.vocab.get(token, self._ukw_id)
 
     @property
     def pad_id(self) -> int:  # noqa: D102
-        return self.token_to_id(self.pad_token)
+        return self._pad_id
 
     @property
     def mask_token_id(self) -> int:  # noqa: D102
-        return self.token_to_id(self.mask_token)
+        return self._mask_token_id
 
     @property
     def all_special_ids(self) -> list[int]:  # noqa: D102
@@ -94,10 +187,34 @@ class GeneTokenizer(Label2IDTokenizer, io.IOMixin):
 
     @property
     def class_id(self) -> int:  # noqa: D102
-        return self.token_to_id(self.cls_token)
+        return self._class_id
+
+    def tokens_to_ids(self, tokens: List[str]) -> List[int]:
+        """Convert tokens to ids, raising a ValueError on the first unknown token like the parent class.
+
+        Tokens are resolved in a single list comprehension over the vocab rather than the parent's per-token
+        `dict.get` + `None` check, since unknown tokens are the exceptional case.
+        """
+        vocab = self.vocab
+        try:
+            return [vocab[token] for token in tokens]
+        except KeyError as e:
+            raise ValueError(f"Do not recognize token: {e.args[0]}") from None
 
-    def tokens_to_ids(self, tokens: List[str]) -> List[int]:  # noqa: D102
-        return super().tokens_to_ids(tokens)
+    def ids_to_tokens(self, ids: List[int]) -> List[str]:
+        """Convert ids to tokens, raising a ValueError on the first unknown id like the parent class.
+
+        Args:
+            ids: Containing ids for each token
+        Returns:
+            Containing tokens
+        """
+        id_to_token = self._id_to_token
+        num_ids = len(id_to_token)
+        tokens = [id_to_token[id_] if 0 <= id_ < num_ids else None for id_ in ids]
+        if None in tokens:
+            raise ValueError(f"Do not recognize ID: {ids[tokens.index(None)]}")
+        return tokens
 
     def save_vocab(self, vocab_file: str) -> None:
         """Saves the vocabulary as a newline delimieted vocabulary file, each line represents an int -> token mapping. line number is assumed to be the integer."""
@@ -109,8 +226,14 @@ class GeneTokenizer(Label2IDTokenizer, io.IOMixin):
         to_serialize["vocab"] = self.vocab
         to_serialize["gene_to_ens"] = self.gene_to_ens
 
-        with open(vocab_file, "w") as f:
-            json.dump(to_serialize, f)
+        # Other ranks may be loading the vocab while it is written, so it is only moved into place once complete.
+        with replace_atomically(vocab_file) as tmp_vocab_file:
+            if orjson is not None:
+                with open(tmp_vocab_file, "wb") as f:
+                    f.write(orjson.dumps(to_serialize))
+            else:
+                with open(tmp_vocab_file, "w") as f:
+                    json.dump(to_serialize, f)
 
     @classmethod
     def from_vocab_file(cls, vocab_file: str) -> None:
@@ -118,11 +241,11 @@ class GeneTokenizer(Label2IDTokenizer, io.IOMixin):
         if not os.path.exists(vocab_file):
             raise FileNotFoundError(f"Vocab file {vocab_file} not found, run preprocessing to create it.")
 
-        with open(vocab_file) as f:
-            to_deserialize = json.load(f)
-            vocab = to_deserialize["vocab"]
-            gene_to_ens = to_deserialize["gene_to_ens"]
+        vocab_file = os.fspath(vocab_file)
+        # The file stats are part of the cache key so that rewriting the file invalidates the cached parse.
+        vocab, gene_to_ens = _read_vocab_file(vocab_file, _fingerprint(vocab_file))
 
+        # The cached dictionaries are shared between calls, this is safe since the constructor copies them.
         tokenizer = GeneTokenizer(vocab, gene_to_ens)
         return tokenizer
 
@@ -148,11 +271,11 @@ class GeneTokenizer(Label2IDTokenizer, io.IOMixin):
         """
         return self.ens_to_gene[ens]
 
-    def genes_to_enss(self, genes: List[str]) -> List[str]:
+    def genes_to_enss(self, genes: Iterable[str]) -> List[str]:
         """Converts a list of gene names to Ensembl IDs.
 
         Args:
-            genes (List[str]): A list of gene names.
+            genes (Iterable[str]): A list (or any iterable) of gene names.
 
         Returns:
             List[str]: A list of corresponding Ensembl IDs.
@@ -160,19 +283,13 @@ class GeneTokenizer(Label2IDTokenizer, io.IOMixin):
         Raises:
             ValueError: If a gene name is not found in the gene_to_ens dictionary.
         """
-        ens_ids = []
-        for gene in genes:
-            if gene in self.gene_to_ens:
-                ens_ids.append(self.gene_to_ens[gene])
-            else:
-                raise ValueError(f"{gene} not found")
-        return ens_ids
+        return _map_or_raise(self.gene_to_ens, genes)
 
-    def enss_to_genes(self, ensemble_ids: List[str]) -> List[str]:
+    def enss_to_genes(self, ensemble_ids: Iterable[str]) -> List[str]:
         """Converts a list of ensemble IDs to gene names.
 
         Args:
-            ensemble_ids (List[str]): A list of ensemble IDs.
+            ensemble_ids (Iterable[str]): A list (or any iterable) of ensemble IDs.
 
         Returns:
             List[str]: A list of gene names corresponding to the ensemble IDs.
@@ -180,10 +297,87 @@ class GeneTokenizer(Label2IDTokenizer, io.IOMixin):
         Raises:
             ValueError: If an ensemble ID is not found in the mapping.
         """
-        genes = []
-        for ens_id in ensemble_ids:
-            if ens_id in self.ens_to_gene:
-                genes.append(self.ens_to_gene[ens_id])
-            else:
-                raise ValueError(f"{ens_id} not found")
-        return genes
+        return _map_or_raise(self.ens_to_gene, ensemble_ids)
+
+    def genes_to_enss_batch(self, genes: Sequence[str]) -> np.ndarray:
+        """Vectorized version of `genes_to_enss`, resolving all gene names with a single hash-index lookup.
+
+        Meant for keys that are already an array and results consumed as an array. For lists, `genes_to_enss` is
+        faster at every size, since converting to and from object arrays costs more than the dict lookups it saves.
+
+        Args:
+            genes: A sequence (list or array) of gene names.
+
+        Returns:
+            An object array of the corresponding Ensembl IDs.
+
+        Raises:
+            ValueError: If a gene name is not found in the gene_to_ens dictionary.
+        """
+        return _lookup_or_raise(*self._gene_to_ens_arrays, genes)
+
+    def enss_to_genes_batch(self, ensemble_ids: Sequence[str]) -> np.ndarray:
+        """Vectorized version of `enss_to_genes`, resolving all ensemble IDs with a single hash-index lookup.
+
+        Like `genes_to_enss_batch`, only worth it over `enss_to_genes` when the inputs and outputs are arrays.
+
+        Args:
+            ensemble_ids: A sequence (list or array) of ensemble IDs.
+
+        Returns:
+            An object array of the corresponding gene names.
+
+        Raises:
+            ValueError: If an ensemble ID is not found in the mapping.
+        """
+        return _lookup_or_raise(*self._ens_to_gene_arrays, ensemble_ids)
+
+
+def _intern(value: T_Key) -> T_Key:
+    """Interns exact `str` values, other keys (eg `numpy.str_` from numpy/pandas, or a NaN gene name) pass through."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def _map_or_raise(mapping: Dict[str, str], keys: Iterable[str]) -> List[str]:
+    """Maps `keys` through `mapping`, raising on the first key that is not present."""
+    out = []
+    append = out.append
+    for key in keys:
+        try:
+            append(mapping[key])
+        except KeyError:
+            raise ValueError(f"{key} not found") from None
+    return out
+
+
+def _as_parallel_arrays(mapping: Dict[str, str]) -> Tuple[pd.Index, np.ndarray]:
+    """Splits `mapping` into a hash index over its keys and an object array of its values in the same order."""
+    return pd.Index(list(mapping.keys()), dtype=object), np.asarray(list(mapping.values()), dtype=object)
+
+
+def _lookup_or_raise(index: pd.Index, values: np.ndarray, keys: Sequence[str]) -> np.ndarray:
+    """Maps `keys` to `values` through the positions of `index`, raising on the first key that is not present."""
+    positions = index.get_indexer(keys)
+    missing = positions == -1
+    if missing.any():
+        raise ValueError(f"{keys[int(np.argmax(missing))]} not found")
+    return values[positions]
+
+
+def _fingerprint(vocab_file: str) -> Tuple[int, int]:
+    """Size and modification time (in ns) of `vocab_file`, used to tell whether a cached parse still matches it."""
+    stat = os.stat(vocab_file)
+    return stat.st_size, stat.st_mtime_ns
+
+
+@functools.lru_cache(maxsize=8)
+def _read_vocab_file(vocab_file: str, fingerprint: Tuple[int, int]) -> Tuple[Dict[str, int], Dict[str, str]]:
+    """Reads the (vocab, gene_to_ens) pair from the JSON vocab file.
+
+    `fingerprint` is not read here, it only keys the cache so that repeated loads of an unchanged vocab within the
+    same process skip parsing entirely.
+    """
+    with open(vocab_file, "rb") as f:
+        raw = f.read()
+    to_deserialize = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    return to_deserialize["vocab"], to_deserialize["gene_to_ens"]
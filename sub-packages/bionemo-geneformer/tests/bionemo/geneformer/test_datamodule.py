@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-Apache2
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from bionemo.geneformer.data.singlecell import datamodule
+from bionemo.geneformer.data.singlecell.datamodule import (
+    NUM_WORKERS_ENV_VAR,
+    SingleCellDataModule,
+    _default_num_workers,
+)
+from bionemo.geneformer.tokenizer.gene_tokenizer import GeneTokenizer
+
+
+@pytest.fixture
+def sixteen_cpus(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(16)), raising=False)
+    monkeypatch.setattr(torch.cuda, "device_count", lambda: 0)
+    for env_var in (NUM_WORKERS_ENV_VAR, "LOCAL_WORLD_SIZE", "SLURM_NTASKS_PER_NODE"):
+        monkeypatch.delenv(env_var, raising=False)
+
+
+@pytest.mark.parametrize(
+    "env, expected",
+    [
+        ({}, 8),  # capped
+        ({"LOCAL_WORLD_SIZE": "4"}, 4),
+        ({"SLURM_NTASKS_PER_NODE": "8(x2)"}, 2),
+        ({"LOCAL_WORLD_SIZE": "32"}, 1),  # at least one worker
+        ({NUM_WORKERS_ENV_VAR: "3", "LOCAL_WORLD_SIZE": "4"}, 3),  # explicit override wins
+        ({NUM_WORKERS_ENV_VAR: "0"}, 0),
+    ],
+)
+def test_default_num_workers(sixteen_cpus, monkeypatch, env, expected):
+    for env_var, value in env.items():
+        monkeypatch.setenv(env_var, value)
+    assert _default_num_workers() == expected
+
+
+def test_default_num_workers_splits_cpus_across_visible_gpus(sixteen_cpus, monkeypatch):
+    monkeypatch.setattr(torch.cuda, "device_count", lambda: 8)
+    assert _default_num_workers() == 2
+
+
+def test_datamodule_rejects_medians_shorter_than_the_vocab(tmp_path):
+    tokenizer = GeneTokenizer.from_medians_and_genes_dicts(
+        {"ENSG0001": 1.0, "ENSG0002": 2.0}, {"GENE1": "ENSG0001", "GENE2": "ENSG0002"}
+    )
+    too_short = np.ones(max(tokenizer.vocab.values()), dtype=np.float64)
+    with pytest.raises(ValueError, match="medians array"):
+        SingleCellDataModule(tokenizer, too_short, predict_dataset_path=tmp_path, num_workers=0)
+
+
+def test_dataloader_without_workers_disables_persistent_workers(sixteen_cpus, monkeypatch, tmp_path):
+    monkeypatch.setenv(NUM_WORKERS_ENV_VAR, "0")
+    tokenizer = GeneTokenizer.from_medians_and_genes_dicts({"ENSG0001": 1.0}, {"GENE1": "ENSG0001"})
+    dm = SingleCellDataModule(
+        tokenizer,
+        {"ENSG0001": 1.0},
+        train_dataset_path=tmp_path,
+        val_dataset_path=tmp_path,
+        test_dataset_path=tmp_path,
+        persistent_workers=True,
+    )
+    assert dm.num_workers == 0
+
+    # Build a plain DataLoader with the same arguments, it rejects persistent workers or prefetching without workers.
+    monkeypatch.setattr(datamodule, "WrappedDataLoader", lambda mode, **kwargs: torch.utils.data.DataLoader(**kwargs))
+    monkeypatch.setattr(SingleCellDataModule, "update_init_global_step", lambda self: None)
+    dataloader = dm._create_dataloader([], mode="train")
+    assert not dataloader.persistent_workers
@@ -0,0 +1,155 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-Apache2
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from bionemo.geneformer.tokenizer.gene_tokenizer import GeneTokenizer, _read_vocab_file
+
+
+@pytest.fixture
+def tokenizer() -> GeneTokenizer:
+    median_dict = {"ENSG0001": 1.0, "ENSG0002": 2.0, "ENSG0003": 3.0}
+    gene_to_ens = {"GENE1": "ENSG0001", "GENE2": "ENSG0002", "GENE3": "ENSG0003"}
+    return GeneTokenizer.from_medians_and_genes_dicts(median_dict, gene_to_ens)
+
+
+def test_genes_to_enss_round_trip(tokenizer: GeneTokenizer):
+    genes = ["GENE3", "GENE1", "GENE3"]
+    enss = tokenizer.genes_to_enss(genes)
+    assert enss == ["ENSG0003", "ENSG0001", "ENSG0003"]
+    assert tokenizer.enss_to_genes(enss) == genes
+    assert tokenizer.genes_to_enss(gene for gene in genes) == enss
+
+
+def test_genes_to_enss_batch_matches_scalar_lookup(tokenizer: GeneTokenizer):
+    genes = ["GENE2", "GENE1"]
+    assert tokenizer.genes_to_enss_batch(genes).tolist() == [tokenizer.gene_tok_to_ens(g) for g in genes]
+    assert tokenizer.genes_to_enss([]) == []
+
+
+def test_genes_to_enss_large_input_uses_same_mapping(tokenizer: GeneTokenizer):
+    genes = ["GENE1", "GENE2", "GENE3"] * 1000
+    assert tokenizer.genes_to_enss(genes) == [tokenizer.gene_tok_to_ens(g) for g in genes]
+    assert tokenizer.enss_to_genes(tokenizer.genes_to_enss(genes)) == genes
+    with pytest.raises(ValueError, match="GENE4 not found"):
+        tokenizer.genes_to_enss(genes + ["GENE4"])
+
+
+def test_genes_to_enss_raises_on_missing_gene(tokenizer: GeneTokenizer):
+    with pytest.raises(ValueError, match="GENE4 not found"):
+        tokenizer.genes_to_enss(["GENE1", "GENE4"])
+    with pytest.raises(ValueError, match="ENSG0004 not found"):
+        tokenizer.enss_to_genes_batch(["ENSG0004"])
+
+
+def test_batch_lookups_follow_gene_to_ens_reassignment(tokenizer: GeneTokenizer):
+    assert tokenizer.genes_to_enss_batch(["GENE1"]).tolist() == ["ENSG0001"]
+    tokenizer.gene_to_ens["GENE4"] = "ENSG0004"
+    tokenizer.gene_to_ens = tokenizer.gene_to_ens
+    assert tokenizer.genes_to_enss_batch(["GENE4"]).tolist() == ["ENSG0004"]
+    assert tokenizer.genes_to_enss(["GENE4"]) == ["ENSG0004"]
+
+    assert tokenizer.enss_to_genes_batch(["ENSG0001"]).tolist() == ["GENE1"]
+    tokenizer.ens_to_gene = {"ENSG0001": "GENE1b"}
+    assert tokenizer.enss_to_genes_batch(["ENSG0001"]).tolist() == ["GENE1b"]
+
+
+def test_special_token_ids_follow_vocab_reassignment(tokenizer: GeneTokenizer):
+    assert tokenizer.pad_id == tokenizer.token_to_id(tokenizer.pad_token)
+    assert tokenizer.class_id == tokenizer.token_to_id(tokenizer.cls_token)
+    tokenizer.vocab = {tokenizer.mask_token: 0, tokenizer.pad_token: 1}
+    assert tokenizer.pad_id == 1
+    assert tokenizer.mask_token_id == 0
+    assert tokenizer.class_id is None
+
+
+def test_build_vocab_keeps_decoding_in_sync(tokenizer: GeneTokenizer):
+    n_tokens = len(tokenizer.vocab)
+    tokenizer.build_vocab(["Z"])
+    assert tokenizer.token_to_id("Z") == n_tokens
+    assert tokenizer.ids_to_tokens([n_tokens]) == ["Z"]
+
+
+def test_token_to_id_maps_unknown_tokens_to_ukw(tokenizer: GeneTokenizer):
+    assert tokenizer.token_to_id("ENSG0002") == tokenizer.vocab["ENSG0002"]
+    assert tokenizer.token_to_id("ENSG0004") == tokenizer.vocab[tokenizer.ukw_token]
+
+
+def test_save_and_load_vocab_round_trip(tokenizer: GeneTokenizer, tmp_path):
+    vocab_file = tmp_path / "vocab" / "geneformer.vocab"
+    tokenizer.save_vocab(vocab_file)  # GeneformerPreprocess passes a Path here.
+    loaded = GeneTokenizer.from_vocab_file(str(vocab_file))
+    assert loaded.vocab == tokenizer.vocab
+    assert loaded.gene_to_ens == tokenizer.gene_to_ens
+
+
+def test_from_vocab_file_rereads_rewritten_vocab(tokenizer: GeneTokenizer, tmp_path):
+    vocab_file = tmp_path / "geneformer.vocab"
+    tokenizer.save_vocab(vocab_file)
+    assert GeneTokenizer.from_vocab_file(vocab_file).vocab == tokenizer.vocab
+
+    # Rewrite the file with the same mtime, like `cp -p` or `rsync -a` would, the size still tells them apart.
+    mtime_ns = os.stat(vocab_file).st_mtime_ns
+    vocab = {**tokenizer.vocab, "ENSG0004": len(tokenizer.vocab)}
+    vocab_file.write_text(json.dumps({"vocab": vocab, "gene_to_ens": tokenizer.gene_to_ens}))
+    os.utime(vocab_file, ns=(mtime_ns, mtime_ns))
+    assert GeneTokenizer.from_vocab_file(vocab_file).vocab == vocab
+
+
+def test_from_vocab_file_reuses_parsed_vocab(tokenizer: GeneTokenizer, tmp_path):
+    vocab_file = tmp_path / "geneformer.vocab"
+    tokenizer.save_vocab(vocab_file)
+    first = GeneTokenizer.from_vocab_file(vocab_file)
+    hits = _read_vocab_file.cache_info().hits
+    second = GeneTokenizer.from_vocab_file(vocab_file)
+    assert _read_vocab_file.cache_info().hits == hits + 1
+
+    # Tokenizers built from the cached parse must not share state.
+    first.vocab["ENSG0004"] = len(first.vocab)
+    assert "ENSG0004" not in second.vocab
+    assert "ENSG0004" not in GeneTokenizer.from_vocab_file(vocab_file).vocab
+
+
+def test_tokens_to_ids(tokenizer: GeneTokenizer):
+    tokens = ["ENSG0002", tokenizer.cls_token, "ENSG0002"]
+    assert tokenizer.tokens_to_ids(tokens) == [tokenizer.token_to_id(t) for t in tokens]
+    with pytest.raises(ValueError, match="Do not recognize token: ENSG0004"):
+        tokenizer.tokens_to_ids(["ENSG0001", "ENSG0004"])
+
+
+def test_build_vocab_assigns_ids_in_order_of_first_appearance():
+    assert GeneTokenizer._build_vocab(["b", "a", "b", "c", "a"]) == {"b": 0, "a": 1, "c": 2}
+    assert GeneTokenizer._build_vocab("abc") == {"abc": 0}
+
+
+def test_tokenizer_accepts_non_str_keys():
+    median_dict = {np.str_("ENSG0001"): 1.0, "ENSG0002": 2.0}
+    gene_to_ens = {np.str_("GENE1"): np.str_("ENSG0001"), float("nan"): "ENSG0002"}
+    tokenizer = GeneTokenizer.from_medians_and_genes_dicts(median_dict, gene_to_ens)
+    assert tokenizer.token_to_id("ENSG0001") == len(tokenizer.special_tokens)
+    assert tokenizer.genes_to_enss(["GENE1"]) == ["ENSG0001"]
+
+
+def test_ids_to_tokens(tokenizer: GeneTokenizer):
+    tokens = ["ENSG0003", tokenizer.pad_token, "ENSG0001"]
+    assert tokenizer.ids_to_tokens(tokenizer.tokens_to_ids(tokens)) == tokens
+    for bad_id in (-1, len(tokenizer.vocab)):
+        with pytest.raises(ValueError, match=f"Do not recognize ID: {bad_id}"):
+            tokenizer.ids_to_tokens([0, bad_id])
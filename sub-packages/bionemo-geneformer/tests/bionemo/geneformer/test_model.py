@@ -196,22 +196,22 @@ def test_nemo1_nemo2_weight_shapes_match(geneformer_config, seed: int = 42):
 
 def _apply_tokenizer(tokenizer, sequences: List[List[str]], device) -> List[torch.Tensor]:
     # parent pulls the tokenizer from the loaded model.
-    try:
-        token_ids = [
-            torch.tensor(
-                [tokenizer.class_id] + [tokenizer.token_to_id(gene_symbol) for gene_symbol in gene_symbols],
-                device=device,
-                dtype=torch.long,
-            )
-            for gene_symbols in sequences
-        ]
-    except TypeError as e:
-        invalid_tokens = {gene_symbol for gene_symbols in sequences for gene_symbol in gene_symbols} - set(
-            tokenizer.vocab.keys()
-        )
+    # token_to_id maps unknown tokens to [UKW], so check membership explicitly rather than relying on a None id.
+    invalid_tokens = {gene_symbol for gene_symbols in sequences for gene_symbol in gene_symbols} - set(
+        tokenizer.vocab.keys()
+    )
+    if invalid_tokens:
         raise ValueError(
             f"Unknown token in gene symbols. Please filter genes for those present in self.tokenizer:\n{invalid_tokens}"
-        ) from e
+        )
+    token_ids = [
+        torch.tensor(
+            [tokenizer.class_id] + [tokenizer.token_to_id(gene_symbol) for gene_symbol in gene_symbols],
+            device=device,
+            dtype=torch.long,
+        )
+        for gene_symbols in sequences
+    ]
     return token_ids
 
 
@@ -0,0 +1,116 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-Apache2
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from bionemo.geneformer.data.singlecell import preprocess
+from bionemo.geneformer.data.singlecell.preprocess import GeneformerPreprocess, _all_newer_than
+
+
+MEDIAN_DICT = {"ENSG0001": 0.5, "ENSG0002": 2.0, "ENSG0003": 3.25}
+GENE_TO_ENS = {"GENE1": "ENSG0001", "GENE2": "ENSG0002", "GENE3": "ENSG0003"}
+
+
+@pytest.fixture
+def preprocessor(tmp_path, monkeypatch) -> GeneformerPreprocess:
+    resources = []
+    for filename, obj in (("gene_name_id_dict.pkl", GENE_TO_ENS), ("gene_median_dictionary.pkl", MEDIAN_DICT)):
+        with open(tmp_path / filename, "wb") as fd:
+            pickle.dump(obj, fd)
+        resources.append(str(tmp_path / filename))
+    # Skip the downloads, the pickles above stand in for the remote resources.
+    monkeypatch.setattr(preprocess.GeneformerResourcePreprocessor, "prepare", lambda self: resources)
+    return GeneformerPreprocess(
+        download_directory=tmp_path,
+        medians_file_path=tmp_path / "out" / "medians.json",
+        tokenizer_vocab_path=tmp_path / "out" / "geneformer.vocab",
+    )
+
+
+def _set_mtime(path, mtime: float) -> None:
+    os.utime(path, (mtime, mtime))
+
+
+def test_all_newer_than(tmp_path):
+    source, output = tmp_path / "source", tmp_path / "output"
+    source.touch()
+    output.touch()
+    _set_mtime(source, 100)
+    _set_mtime(output, 200)
+    assert _all_newer_than([output], [source])
+    _set_mtime(output, 100)
+    assert _all_newer_than([output], [source])
+    _set_mtime(output, 50)
+    assert not _all_newer_than([output], [source])
+    assert not _all_newer_than([output, tmp_path / "missing"], [source])
+
+
+def test_preprocess_reuses_converted_artifacts(preprocessor: GeneformerPreprocess, monkeypatch):
+    first = preprocessor.preprocess()
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("the pickles should not be loaded when the converted artifacts are up to date")
+
+    monkeypatch.setattr(preprocess.pickle, "load", _fail)
+    second = preprocessor.preprocess()
+    assert second["median_dict"] == MEDIAN_DICT
+    assert second["tokenizer"].vocab == first["tokenizer"].vocab
+    assert second["tokenizer"].gene_to_ens == GENE_TO_ENS
+    np.testing.assert_array_equal(second["medians"], first["medians"])
+
+
+def test_preprocess_rebuilds_when_resources_are_newer(preprocessor: GeneformerPreprocess, tmp_path, monkeypatch):
+    preprocessor.preprocess()
+    for filename in ("gene_name_id_dict.pkl", "gene_median_dictionary.pkl"):
+        _set_mtime(tmp_path / filename, os.path.getmtime(tmp_path / "out" / "geneformer.vocab") + 10)
+
+    loads = []
+    original_load = pickle.load
+    monkeypatch.setattr(preprocess.pickle, "load", lambda fd: loads.append(fd) or original_load(fd))
+    assert preprocessor.preprocess()["median_dict"] == MEDIAN_DICT
+    assert len(loads) == 2
+
+
+def test_preprocess_rebuilds_medians_that_do_not_match_the_vocab(preprocessor: GeneformerPreprocess, tmp_path):
+    preprocessor.preprocess()
+    medians_npy = tmp_path / "out" / "medians.npy"
+    mtime = os.path.getmtime(medians_npy)
+    np.save(medians_npy, np.ones(2))
+    _set_mtime(medians_npy, mtime)
+
+    result = preprocessor.preprocess()
+    assert result["median_dict"] == MEDIAN_DICT
+    assert len(result["medians"]) == max(result["tokenizer"].vocab.values()) + 1
+
+
+def test_preprocess_rebuild_replaces_rather_than_truncates_files(preprocessor: GeneformerPreprocess, tmp_path):
+    out = tmp_path / "out"
+    preprocessor.preprocess()
+    inodes = {filename: os.stat(out / filename).st_ino for filename in os.listdir(out)}
+    assert sorted(inodes) == ["geneformer.vocab", "medians.json", "medians.npy"]
+    for filename in ("gene_name_id_dict.pkl", "gene_median_dictionary.pkl"):
+        _set_mtime(tmp_path / filename, os.path.getmtime(out / "geneformer.vocab") + 10)
+
+    # Other ranks (or the memory map of a running job) may be reading the previous files, so each one is swapped for
+    #  a new inode instead of being rewritten in place.
+    preprocessor.preprocess()
+    assert sorted(os.listdir(out)) == sorted(inodes)
+    for filename, inode in inodes.items():
+        assert os.stat(out / filename).st_ino != inode, filename
@@ -0,0 +1,72 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-Apache2
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import itertools
+
+import numpy as np
+import pytest
+import torch
+
+from bionemo.geneformer.data.singlecell.dataset import _token_ids_or_missing, process_item
+from bionemo.geneformer.data.singlecell.utils import medians_by_token_id
+from bionemo.geneformer.tokenizer.gene_tokenizer import GeneTokenizer
+
+
+@pytest.fixture
+def tokenizer() -> GeneTokenizer:
+    median_dict = {"ENSG0001": 1.0, "ENSG0002": 2.0, "ENSG0003": 4.0}
+    gene_to_ens = {"GENE1": "ENSG0001", "GENE2": "ENSG0002", "GENE3": "ENSG0003"}
+    return GeneTokenizer.from_medians_and_genes_dicts(median_dict, gene_to_ens)
+
+
+# ENSG0004 has a median but is not in the vocab, UNKNOWN has neither. Both are dropped from the sample.
+FEATURE_IDS = np.array(["ENSG0001", "UNKNOWN", "ENSG0002", "ENSG0004", "ENSG0003"])
+GENE_IDXS = np.array([0, 1, 2, 3, 4])
+GENE_DATA = np.array([1, 100, 8, 50, 8])
+MEDIAN_DICT = {"ENSG0001": 1.0, "ENSG0002": 2.0, "ENSG0003": 4.0, "ENSG0004": 1.0}
+
+
+def _process(tokenizer: GeneTokenizer, gene_median, feature_token_ids, mask_prob: float):
+    return process_item(
+        GENE_DATA,
+        GENE_IDXS,
+        FEATURE_IDS,
+        tokenizer,
+        gene_median=gene_median,
+        rng=np.random.default_rng(0),
+        max_len=16,
+        mask_prob=mask_prob,
+        feature_token_ids=feature_token_ids,
+    )
+
+
+def test_process_item_drops_unknown_genes_and_ranks_by_normalized_expression(tokenizer: GeneTokenizer):
+    item = _process(tokenizer, MEDIAN_DICT, None, mask_prob=0.0)
+    # Normalized expression is 1/1, 8/2 and 8/4 for ENSG0001, ENSG0002 and ENSG0003, ranked in descending order.
+    expected = [tokenizer.class_id] + tokenizer.tokens_to_ids(["ENSG0002", "ENSG0003", "ENSG0001"])
+    assert item["text"].tolist() == expected
+
+
+@pytest.mark.parametrize("mask_prob", [0.0, 0.5])
+def test_process_item_lookup_paths_agree(tokenizer: GeneTokenizer, mask_prob: float):
+    medians = medians_by_token_id(tokenizer.vocab, MEDIAN_DICT)
+    feature_token_ids = _token_ids_or_missing(tokenizer.vocab, FEATURE_IDS)
+    reference = _process(tokenizer, MEDIAN_DICT, None, mask_prob)
+    for gene_median, token_ids in itertools.product([MEDIAN_DICT, medians], [None, feature_token_ids]):
+        item = _process(tokenizer, gene_median, token_ids, mask_prob)
+        torch.testing.assert_close(item["text"], reference["text"])
+        torch.testing.assert_close(item["labels"], reference["labels"])
+        torch.testing.assert_close(item["loss_mask"], reference["loss_mask"])
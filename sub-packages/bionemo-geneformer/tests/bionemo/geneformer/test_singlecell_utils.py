@@ -0,0 +1,50 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: LicenseRef-Apache2
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+
+import numpy as np
+import pytest
+
+from bionemo.geneformer.data.singlecell.utils import medians_by_token_id, replace_atomically
+
+
+def test_medians_by_token_id_defaults_to_no_normalization():
+    vocab = {"[PAD]": 0, "ENSG0002": 1, "ENSG0001": 2}
+    median_dict = {"ENSG0001": 0.5, "ENSG0002": 2.0, "ENSG0003": 3.0}
+    np.testing.assert_array_equal(medians_by_token_id(vocab, median_dict), [1.0, 2.0, 0.5])
+
+
+def test_replace_atomically_swaps_in_the_complete_file(tmp_path):
+    path = tmp_path / "medians.json"
+    path.write_text("old")
+    with replace_atomically(path) as tmp:
+        with open(tmp, "w") as f:
+            f.write("new")
+        assert path.read_text() == "old"
+    assert path.read_text() == "new"
+    assert os.listdir(tmp_path) == ["medians.json"]
+
+
+def test_replace_atomically_keeps_the_original_on_error(tmp_path):
+    path = tmp_path / "medians.json"
+    path.write_text("old")
+    with pytest.raises(RuntimeError), replace_atomically(path) as tmp:
+        with open(tmp, "w") as f:
+            f.write("partial")
+        raise RuntimeError
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["medians.json"]
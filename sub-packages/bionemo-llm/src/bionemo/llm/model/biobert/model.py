@@ -25,6 +25,7 @@ from typing import (
     Literal,
     Optional,
     Sequence,
+    Tuple,
     Type,
     TypedDict,
     TypeVar,
@@ -186,16 +187,13 @@ class MegatronBioBertModel(LanguageModule):
         self.max_sequence_length = max_sequence_length
         self.tokenizer = tokenizer
         self.pre_process = pre_process
-        self.post_process = post_process
         self.fp16_lm_cross_entropy = fp16_lm_cross_entropy
         self.parallel_output = parallel_output
         self.share_embeddings_and_output_weights = share_embeddings_and_output_weights
         self.position_embedding_type = position_embedding_type
-        self.add_binary_head = add_binary_head
         self.return_embeddings = return_embeddings
         self.include_embeddings = include_embeddings
         self.include_hiddens = include_hiddens
-        self.skip_logits = skip_logits
 
         # megatron core pipelining currently depends on model type
         self.model_type = ModelType.encoder_or_decoder
@@ -218,6 +216,7 @@ class MegatronBioBertModel(LanguageModule):
                 # bug in megatron: they list the type as `float` but they default to `None` so it should be `Optional[float]`
                 seq_len_interpolation_factor=seq_len_interpolation_factor,  # type: ignore
             )
+        self._rotary_pos_emb_cache: Optional[Tuple[int, Tensor]] = None
 
         # Transformer.
         self.encoder = TransformerBlock(
@@ -377,7 +376,12 @@ class MegatronBioBertModel(LanguageModule):
             rotary_seq_len = self.rotary_pos_emb.get_rotary_seq_len(
                 inference_params, self.encoder, encoder_input, self.config
             )
-            rotary_pos_emb = self.rotary_pos_emb(rotary_seq_len)
+            # The cos/sin tables only depend on the sequence length, which is usually the same from one step to the
+            #  next (fixed length padding), so reuse the last table instead of recomputing it on every forward. Only
+            #  one entry is kept so that dynamic padding cannot grow the cache.
+            if self._rotary_pos_emb_cache is None or self._rotary_pos_emb_cache[0] != rotary_seq_len:
+                self._rotary_pos_emb_cache = (rotary_seq_len, self.rotary_pos_emb(rotary_seq_len))
+            rotary_pos_emb = self._rotary_pos_emb_cache[1]
 
         # Run encoder.
         hidden_states = self.encoder(